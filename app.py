@@ -3,24 +3,41 @@ from __future__ import annotations
 import argparse
 import atexit
 import base64
+from contextlib import contextmanager
+import csv
 import ctypes
+import email.utils
+import functools
+import io
 import json
 import logging
-from logging.handlers import RotatingFileHandler
+import math
 import mimetypes
 import os
 from pathlib import Path
+import re
 import shutil
 import socket
-import sqlite3
+import stat
+import struct
 import subprocess
 import sys
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 import http.client
+from http import HTTPStatus
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import sqlite3
+
+try:
+    import orjson
+except ImportError:  # optional: faster backup_json serialization
+    orjson = None
 
 from global_hotkey import (
     DEFAULT_HOTKEY_KEY,
@@ -46,9 +63,21 @@ SOUND_ACTION_DIRS = {
 }
 SUPPORTED_SOUND_EXTENSIONS = {".wav", ".mp3", ".ogg", ".m4a", ".aac", ".flac"}
 MAX_SOUND_FILE_BYTES = 12 * 1024 * 1024
+MAX_STATIC_CACHE_FILE_BYTES = 1024 * 1024
+TX_WRITE_BATCH_SIZE = 64
+TX_WRITE_FLUSH_INTERVAL_S = 0.1
+TX_WRITE_RETRY_DELAY_S = 1.0
+_CSV_NEWLINE_TRANS = str.maketrans({"\n": " ", "\r": " "})
+
+_SQL_TX_INSERT = "INSERT INTO transactions(id, amount, comment, created_at) VALUES (?, ?, ?, ?)"
+_SQL_TX_DELETE = "DELETE FROM transactions WHERE id = ?"
+_SQL_TX_LIST = "SELECT id, amount, comment, created_at FROM transactions ORDER BY id DESC"
+_SQL_TX_EXPORT = "SELECT amount, comment, created_at FROM transactions ORDER BY id DESC"
 
 
 def setup_logging(debug: bool) -> logging.Logger:
+    from logging.handlers import RotatingFileHandler
+
     if os.name == "nt":
         try:
             if hasattr(sys.stdout, "reconfigure"):
@@ -88,12 +117,41 @@ def setup_logging(debug: bool) -> logging.Logger:
     return logger
 
 
+# struct linger is two u_short fields on Windows and two ints elsewhere.
+_SO_LINGER_RESET = struct.pack("HH" if os.name == "nt" else "ii", 1, 0)
+
+
+@functools.lru_cache(maxsize=8)
+def _resolve_probe_host(host: str) -> tuple[tuple[int, int, int, tuple], ...]:
+    # Probes only ever target a handful of local hosts; resolve each once.
+    return tuple(
+        (family, sock_type, proto, addr)
+        for family, sock_type, proto, _, addr in socket.getaddrinfo(host, 0, type=socket.SOCK_STREAM)
+    )
+
+
 def is_port_open(host: str, port: int, timeout_s: float = 0.25) -> bool:
     try:
-        with socket.create_connection((host, port), timeout=timeout_s):
-            return True
+        addrs = _resolve_probe_host(host)
     except OSError:
         return False
+    for family, sock_type, proto, addr in addrs:
+        addr = (addr[0], int(port), *addr[2:])
+        s = socket.socket(family, sock_type, proto)
+        s.settimeout(timeout_s)
+        try:
+            # Close with RST instead of FIN so probes leave no TIME_WAIT sockets behind.
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _SO_LINGER_RESET)
+        except OSError:
+            pass  # only affects how the probe closes, not its result
+        try:
+            if s.connect_ex(addr) == 0:
+                return True
+        except OSError:
+            pass
+        finally:
+            s.close()
+    return False
 
 
 def is_http_healthy(host: str, port: int, timeout_s: float = 2.0) -> bool:
@@ -112,21 +170,51 @@ def is_http_healthy(host: str, port: int, timeout_s: float = 2.0) -> bool:
             pass
 
 
-def wait_for_http(host: str, port: int, timeout_s: float, logger: logging.Logger) -> None:
-    deadline = time.time() + timeout_s
-    while time.time() < deadline:
-        if is_http_healthy(host, port, timeout_s=2.0):
-            logger.debug("HTTP is healthy: %s:%d", host, port)
-            return
-        time.sleep(0.1)
+def wait_for_http(
+    host: str,
+    port: int,
+    timeout_s: float,
+    logger: logging.Logger,
+    *,
+    ready: Optional[threading.Event] = None,
+) -> None:
+    deadline = time.monotonic() + timeout_s
+    delay_s = 0.05
+    # One keep-alive connection for the whole wait; http.client reopens it
+    # transparently after close(), so a failed probe just drops the socket.
+    # A closed port fails fast with ECONNREFUSED, so no separate TCP check.
+    conn = http.client.HTTPConnection(host, port, timeout=0.5)
+    try:
+        while time.monotonic() < deadline:
+            try:
+                conn.request("HEAD", "/", headers={"Connection": "keep-alive"})
+                resp = conn.getresponse()
+                resp.read()
+                if 200 <= resp.status < 500:
+                    logger.debug("HTTP is healthy: %s:%d", host, port)
+                    return
+            except Exception:
+                conn.close()
+            if ready is not None and not ready.is_set():
+                # Woken early as soon as the server logs that it is ready.
+                ready.wait(delay_s)
+            else:
+                time.sleep(delay_s)
+            delay_s = min(delay_s * 2, 0.5)
+    finally:
+        conn.close()
     raise TimeoutError(f"UI server did not become healthy in time ({host}:{port})")
 
 
 def pick_free_port(host: str, preferred: int, max_tries: int = 25) -> int:
     if not is_port_open(host, preferred):
         return preferred
-    for p in range(preferred + 1, preferred + 1 + max_tries):
-        if not is_port_open(host, p):
+    # Probe the fallback range in parallel so a busy range costs one timeout, not max_tries.
+    candidates = range(preferred + 1, preferred + 1 + max_tries)
+    with ThreadPoolExecutor(max_workers=max(1, max_tries), thread_name_prefix="port-probe") as pool:
+        busy = list(pool.map(lambda p: is_port_open(host, p), candidates))
+    for p, is_busy in zip(candidates, busy):
+        if not is_busy:
             return p
     s = socket.socket()
     try:
@@ -137,10 +225,56 @@ def pick_free_port(host: str, preferred: int, max_tries: int = 25) -> int:
 
 
 def start_static_ui_server(root_dir: Path, logger: logging.Logger) -> tuple[ThreadingHTTPServer, str]:
+    # The export is immutable while the app runs, so small assets are read once
+    # and then served from memory without another stat() or open().
+    asset_cache: dict[str, tuple[bytes, str, datetime]] = {}
+
     class Handler(SimpleHTTPRequestHandler):
         def __init__(self, *args, **kwargs):
             super().__init__(*args, directory=str(root_dir), **kwargs)
 
+        def send_head(self):
+            fs_path = self.translate_path(self.path)
+            if fs_path.endswith("/"):
+                # translate_path keeps the trailing slash of directory URLs;
+                # serve their index.html from the cache like any other file.
+                fs_path = os.path.join(fs_path, "index.html")
+            cached = asset_cache.get(fs_path)
+            if cached is None:
+                try:
+                    st = os.stat(fs_path)
+                except OSError:
+                    return super().send_head()
+                if not stat.S_ISREG(st.st_mode) or st.st_size > MAX_STATIC_CACHE_FILE_BYTES:
+                    return super().send_head()
+                with open(fs_path, "rb") as f:
+                    body = f.read()
+                last_modified = datetime.fromtimestamp(st.st_mtime, timezone.utc).replace(microsecond=0)
+                cached = (body, self.guess_type(fs_path), last_modified)
+                asset_cache[fs_path] = cached
+
+            body, content_type, last_modified = cached
+            if "If-Modified-Since" in self.headers and "If-None-Match" not in self.headers:
+                # Same conditional-GET rules as SimpleHTTPRequestHandler.send_head.
+                try:
+                    ims = email.utils.parsedate_to_datetime(self.headers["If-Modified-Since"])
+                except (TypeError, IndexError, OverflowError, ValueError):
+                    ims = None
+                if ims is not None:
+                    if ims.tzinfo is None:
+                        ims = ims.replace(tzinfo=timezone.utc)
+                    if ims.tzinfo is timezone.utc and last_modified <= ims:
+                        self.send_response(HTTPStatus.NOT_MODIFIED)
+                        self.end_headers()
+                        return None
+
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Last-Modified", self.date_time_string(last_modified.timestamp()))
+            self.end_headers()
+            return io.BytesIO(body)
+
         def end_headers(self) -> None:
             request_path = self.path.split("?", 1)[0]
             if request_path.startswith("/_next/static/"):
@@ -170,46 +304,40 @@ def start_static_ui_server(root_dir: Path, logger: logging.Logger) -> tuple[Thre
     return httpd, url
 
 
-def _windows_get_listen_pid(port: int, logger: logging.Logger) -> Optional[int]:
+def _windows_get_pid_and_cmd(port: int, logger: logging.Logger) -> tuple[Optional[int], str]:
+    # One PowerShell launch for both lookups; each cold start costs hundreds of ms.
+    script = (
+        f"$p = Get-NetTCPConnection -LocalPort {int(port)} -State Listen -ErrorAction SilentlyContinue | "
+        "Select-Object -First 1 -ExpandProperty OwningProcess; "
+        "if ($p) { [string]$p + '|' + (Get-CimInstance Win32_Process -Filter ('ProcessId=' + $p)).CommandLine }"
+    )
     try:
         out = subprocess.check_output(
-            [
-                "powershell",
-                "-NoProfile",
-                "-Command",
-                f"Get-NetTCPConnection -LocalPort {int(port)} -State Listen -ErrorAction SilentlyContinue | "
-                "Select-Object -First 1 -ExpandProperty OwningProcess",
-            ],
+            ["powershell", "-NoProfile", "-Command", script],
             text=True,
             encoding="utf-8",
             errors="replace",
         ).strip()
-        if not out:
-            return None
-        return int(out)
     except Exception:
-        logger.debug("Could not determine owning PID for port %s", port, exc_info=True)
-        return None
+        logger.debug("Could not determine owning process for port %s", port, exc_info=True)
+        return None, ""
+    if not out:
+        return None, ""
+    pid_str, _, cmd = out.partition("|")
+    try:
+        return int(pid_str), cmd.strip()
+    except ValueError:
+        logger.debug("Unexpected owning process output for port %s: %r", port, out)
+        return None, ""
 
 
-def _windows_get_commandline(pid: int, logger: logging.Logger) -> str:
-    try:
-        out = subprocess.check_output(
-            [
-                "powershell",
-                "-NoProfile",
-                "-Command",
-                f"Get-CimInstance Win32_Process -Filter 'ProcessId={int(pid)}' | "
-                "Select-Object -ExpandProperty CommandLine",
-            ],
-            text=True,
-            encoding="utf-8",
-            errors="replace",
-        )
-        return (out or "").strip()
-    except Exception:
-        logger.debug("Could not read command line for PID %s", pid, exc_info=True)
-        return ""
+_NEXT_START_SERVER_RE = re.compile(
+    r"node_modules[\\/]next[\\/]dist[\\/]server[\\/]lib[\\/]start-server\.js", re.IGNORECASE
+)
+
+
+def _looks_like_our_next(cmd: str, ui_dir: Path) -> bool:
+    return str(ui_dir).lower() in cmd.lower() and _NEXT_START_SERVER_RE.search(cmd) is not None
 
 
 def _windows_kill_pid(pid: int, logger: logging.Logger) -> bool:
@@ -229,18 +357,30 @@ def _windows_kill_pid(pid: int, logger: logging.Logger) -> bool:
         return False
 
 
-def _pick_package_manager(logger: logging.Logger) -> list[str]:
+def _find_package_manager() -> Optional[tuple[str, bool]]:
+    """Return ``(absolute_exe, is_npm_fallback)`` for the first pnpm or npm in PATH."""
     candidates_pnpm = ["pnpm.cmd", "pnpm"] if os.name == "nt" else ["pnpm"]
     candidates_npm = ["npm.cmd", "npm"] if os.name == "nt" else ["npm"]
 
     for exe in candidates_pnpm:
-        if shutil.which(exe):
-            return [exe]
+        resolved = shutil.which(exe)
+        if resolved:
+            return resolved, False
     for exe in candidates_npm:
-        if shutil.which(exe):
-            logger.warning("pnpm not found in PATH, falling back to npm.")
-            return [exe]
-    raise RuntimeError("Neither pnpm nor npm found in PATH. Install Node.js + pnpm.")
+        resolved = shutil.which(exe)
+        if resolved:
+            return resolved, True
+    return None
+
+
+def _pick_package_manager(logger: logging.Logger) -> list[str]:
+    found = _find_package_manager()
+    if found is None:
+        raise RuntimeError("Neither pnpm nor npm found in PATH. Install Node.js + pnpm.")
+    exe, is_npm_fallback = found
+    if is_npm_fallback:
+        logger.warning("pnpm not found in PATH, falling back to npm.")
+    return [exe]
 
 
 def _check_node_version(min_major: int, logger: logging.Logger) -> None:
@@ -267,16 +407,21 @@ def _check_node_version(min_major: int, logger: logging.Logger) -> None:
         )
 
 
+# Lines Next.js prints once `next dev` / `next start` is accepting requests.
+_NEXT_READY_MARKERS = ("Ready in", "- Local:")
+
+
 def start_next_server(
     *,
     ui_dir: Path,
     port: int,
     dev: bool,
     logger: logging.Logger,
+    ready: Optional[threading.Event] = None,
 ) -> subprocess.Popen:
     pm = _pick_package_manager(logger)
 
-    if pm[0].lower().startswith("pnpm"):
+    if Path(pm[0]).name.lower().startswith("pnpm"):
         cmd = pm + [
             "-C",
             str(ui_dir),
@@ -309,17 +454,33 @@ def start_next_server(
         stdin=subprocess.DEVNULL,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-        bufsize=1,
     )
 
+    def _log_line(raw: bytes) -> None:
+        line = raw.decode("utf-8", errors="replace").rstrip()
+        logger.info("[ui] %s", line)
+        if ready is not None and not ready.is_set() and any(
+            marker in line for marker in _NEXT_READY_MARKERS
+        ):
+            ready.set()
+
     def _pump_output() -> None:
         try:
             assert proc.stdout is not None
-            for line in proc.stdout:
-                logger.info("[ui] %s", line.rstrip())
+            # Read raw chunks and split lines ourselves instead of decoding the
+            # pipe line by line through TextIOWrapper.
+            fd = proc.stdout.fileno()
+            tail = b""
+            while True:
+                chunk = os.read(fd, 8192)
+                if not chunk:
+                    break
+                lines = (tail + chunk).split(b"\n")
+                tail = lines.pop()
+                for raw in lines:
+                    _log_line(raw)
+            if tail:
+                _log_line(tail)
         except Exception:
             logger.exception("Failed to read UI server output.")
 
@@ -373,11 +534,27 @@ def _utc_iso_now() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def _json_bytes(value: object) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _tuple_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    # Plain tuples skip sqlite3.Row construction and name lookups on bulk reads.
+    cur = conn.cursor()
+    cur.row_factory = None
+    return cur
+
+
 def init_db(conn: sqlite3.Connection, logger: logging.Logger) -> None:
     conn.execute("PRAGMA busy_timeout = 5000")
     conn.execute("PRAGMA journal_mode = WAL")
     conn.execute("PRAGMA synchronous = NORMAL")
     conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA mmap_size = 268435456")
+    conn.execute("PRAGMA cache_size = -20000")
+    conn.execute("PRAGMA wal_autocheckpoint = 1000")
     conn.execute(
         """
         CREATE TABLE IF NOT EXISTS transactions (
@@ -388,7 +565,9 @@ def init_db(conn: sqlite3.Connection, logger: logging.Logger) -> None:
         )
         """
     )
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_created_at ON transactions(created_at DESC)")
+    # Transaction ids are time-ordered, so listings walk the primary key and
+    # the old created_at index only added insert cost.
+    conn.execute("DROP INDEX IF EXISTS idx_transactions_created_at")
     conn.execute(
         """
         CREATE TABLE IF NOT EXISTS inventory_items (
@@ -429,10 +608,29 @@ class DesktopApi:
         self._hotkey_listener: Optional[GlobalHotkeyListener] = None
         self._data_dir = data_dir
         self._db_path = db_path
+        self._data_dir_str = os.fspath(data_dir)
+        self._db_path_str = os.fspath(db_path)
+        # Imported here so --help and other early exits skip loading sqlite3.
+        import sqlite3
+
         self._lock = threading.Lock()
-        self._conn = sqlite3.connect(str(db_path), timeout=5.0, check_same_thread=False)
+        self._conn = sqlite3.connect(self._db_path_str, timeout=5.0, check_same_thread=False)
         self._conn.row_factory = sqlite3.Row
         init_db(self._conn, logger=logger)
+        # transaction_add only queues rows; the writer thread commits them in
+        # batches so a burst of UI input costs one fsync instead of one per row.
+        self._tx_cond = threading.Condition(self._lock)
+        self._tx_pending: list[tuple[int, float, str, str]] = []
+        self._tx_closing = False
+        self._last_tx_id = int(
+            self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0]
+        )
+        self._tx_writer = threading.Thread(
+            target=self._tx_writer_loop, name="tx-writer", daemon=True
+        )
+        self._tx_writer.start()
+        self._read_pool_lock = threading.Lock()
+        self._read_pool: list[sqlite3.Connection] = []
 
     def bind_window(self, window) -> None:
         self._window = window
@@ -612,8 +810,8 @@ class DesktopApi:
             "ok": True,
             "app": APP_NAME,
             "version": APP_VERSION,
-            "dataDir": str(self._data_dir),
-            "dbPath": str(self._db_path),
+            "dataDir": self._data_dir_str,
+            "dbPath": self._db_path_str,
         }
 
     def sound_files_list(self, action: str) -> dict:
@@ -659,11 +857,95 @@ class DesktopApi:
             return {"ok": False, "error": "INTERNAL_ERROR"}
 
     def _next_transaction_id_unlocked(self) -> int:
-        tx_id = int(time.time() * 1000)
-        while self._conn.execute("SELECT 1 FROM transactions WHERE id = ?", (tx_id,)).fetchone():
-            tx_id += 1
+        # Queued rows are not in the table yet, so ids come from a counter that
+        # stays ahead of both the database and the pending batch.
+        tx_id = max(int(time.time() * 1000), self._last_tx_id + 1)
+        self._last_tx_id = tx_id
         return tx_id
 
+    def _open_read_connection(self) -> sqlite3.Connection:
+        import sqlite3
+
+        uri = Path(self._db_path_str).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, timeout=5.0, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _read_connection(self):
+        # WAL lets readers run beside the writer, so bulk reads use pooled
+        # read-only connections and never hold self._lock while they stream.
+        with self._read_pool_lock:
+            conn = self._read_pool.pop() if self._read_pool else None
+        if conn is None:
+            conn = self._open_read_connection()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            with self._read_pool_lock:
+                if self._tx_closing:
+                    conn.close()
+                else:
+                    self._read_pool.append(conn)
+
+    def _flush_tx_pending_unlocked(self) -> None:
+        if not self._tx_pending:
+            return
+        import sqlite3
+
+        batch = self._tx_pending
+        self._tx_pending = []
+        try:
+            try:
+                self._conn.executemany(_SQL_TX_INSERT, batch)
+            except sqlite3.IntegrityError:
+                # A bad row will never succeed; write the rest one by one so it
+                # cannot hold the whole queue hostage.
+                self._rollback_quietly()
+                for row in batch:
+                    try:
+                        self._conn.execute(_SQL_TX_INSERT, row)
+                    except sqlite3.IntegrityError:
+                        self._logger.exception("Dropping queued transaction %r", row)
+            self._conn.commit()
+        except Exception:
+            # Locked database, I/O failure and the like can clear up.
+            # transaction_add already reported these rows as saved, so keep
+            # them queued for the next flush and let the caller fail instead.
+            self._tx_pending[:0] = batch
+            self._rollback_quietly()
+            raise
+
+    def _rollback_quietly(self) -> None:
+        try:
+            self._conn.rollback()
+        except Exception:
+            self._logger.debug("Rollback after failed transaction flush failed", exc_info=True)
+
+    def _tx_writer_loop(self) -> None:
+        with self._tx_cond:
+            while True:
+                self._tx_cond.wait_for(lambda: self._tx_pending or self._tx_closing)
+                self._tx_cond.wait_for(
+                    lambda: len(self._tx_pending) >= TX_WRITE_BATCH_SIZE or self._tx_closing,
+                    timeout=TX_WRITE_FLUSH_INTERVAL_S,
+                )
+                try:
+                    self._flush_tx_pending_unlocked()
+                except Exception:
+                    self._logger.exception(
+                        "Failed to write %d queued transactions", len(self._tx_pending)
+                    )
+                    if not self._tx_closing:
+                        # Back off before retrying; close() makes the final attempt.
+                        self._tx_cond.wait_for(
+                            lambda: self._tx_closing, timeout=TX_WRITE_RETRY_DELAY_S
+                        )
+                if self._tx_closing:
+                    return
+
     def setting_get(self, key: str) -> dict:
         try:
             k = (key or "").strip()
@@ -777,17 +1059,12 @@ class DesktopApi:
     def transactions_list(self) -> dict:
         try:
             with self._lock:
-                rows = self._conn.execute(
-                    "SELECT id, amount, comment, created_at FROM transactions ORDER BY created_at DESC"
-                ).fetchall()
+                self._flush_tx_pending_unlocked()
+            with self._read_connection() as conn:
+                rows = _tuple_cursor(conn).execute(_SQL_TX_LIST).fetchall()
             items = [
-                {
-                    "id": int(r["id"]),
-                    "amount": float(r["amount"]),
-                    "comment": r["comment"] or "",
-                    "createdAt": r["created_at"],
-                }
-                for r in rows
+                {"id": tx_id, "amount": amt, "comment": comm or "", "createdAt": created}
+                for tx_id, amt, comm, created in rows
             ]
             return {"ok": True, "items": items}
         except Exception:
@@ -800,16 +1077,18 @@ class DesktopApi:
                 num = float(amount)
             except Exception:
                 return {"ok": False, "error": "INVALID_AMOUNT"}
+            # SQLite stores NaN as NULL, which the NOT NULL column rejects.
+            if not math.isfinite(num):
+                return {"ok": False, "error": "INVALID_AMOUNT"}
 
             created_at = _utc_iso_now()
             comm = (comment or "").strip()
-            with self._lock:
+            with self._tx_cond:
+                if self._tx_closing:
+                    return {"ok": False, "error": "CLOSED"}
                 tx_id = self._next_transaction_id_unlocked()
-                self._conn.execute(
-                    "INSERT INTO transactions(id, amount, comment, created_at) VALUES (?, ?, ?, ?)",
-                    (tx_id, num, comm, created_at),
-                )
-                self._conn.commit()
+                self._tx_pending.append((tx_id, num, comm, created_at))
+                self._tx_cond.notify()
             return {
                 "ok": True,
                 "item": {"id": tx_id, "amount": num, "comment": comm, "createdAt": created_at},
@@ -821,7 +1100,8 @@ class DesktopApi:
     def transaction_delete(self, tx_id: int) -> dict:
         try:
             with self._lock:
-                cur = self._conn.execute("DELETE FROM transactions WHERE id = ?", (int(tx_id),))
+                self._flush_tx_pending_unlocked()
+                cur = self._conn.execute(_SQL_TX_DELETE, (int(tx_id),))
                 self._conn.commit()
             return {"ok": True, "deleted": cur.rowcount}
         except Exception:
@@ -831,6 +1111,7 @@ class DesktopApi:
     def transaction_history_clear(self) -> dict:
         try:
             with self._lock:
+                self._tx_pending.clear()
                 self._conn.execute("DELETE FROM transactions")
                 self._conn.commit()
             return {"ok": True}
@@ -841,6 +1122,11 @@ class DesktopApi:
     def transactions_clear(self) -> dict:
         try:
             with self._lock:
+                self._tx_pending.clear()
+                # An unfiltered DELETE on a table without triggers compiles to
+                # SQLite's truncate optimization (OP_Clear), so this is not a
+                # row-by-row delete. Adding triggers disables this
+                # optimization; revisit transactions_clear if you do.
                 self._conn.execute("DELETE FROM inventory_items")
                 self._conn.execute("DELETE FROM transactions")
                 self._conn.commit()
@@ -915,7 +1201,7 @@ class DesktopApi:
                 tx_id = self._next_transaction_id_unlocked() if add_tx else 0
                 if add_tx:
                     self._conn.execute(
-                        "INSERT INTO transactions(id, amount, comment, created_at) VALUES (?, ?, ?, ?)",
+                        _SQL_TX_INSERT,
                         (tx_id, -abs(price), comm, created_at),
                     )
                 cur = self._conn.execute(
@@ -957,7 +1243,7 @@ class DesktopApi:
                     return {"ok": False, "error": "NOT_FOUND"}
                 purchase_tx_id = int(row["purchase_tx_id"])
                 if cancel_purchase and purchase_tx_id > 0:
-                    self._conn.execute("DELETE FROM transactions WHERE id = ?", (purchase_tx_id,))
+                    self._conn.execute(_SQL_TX_DELETE, (purchase_tx_id,))
                 self._conn.execute("DELETE FROM inventory_items WHERE id = ?", (int(item_id),))
                 self._conn.commit()
             return {"ok": True}
@@ -1065,24 +1351,19 @@ class DesktopApi:
             if not path:
                 return {"ok": False, "error": "CANCELLED"}
 
+            count = 0
             with self._lock:
-                rows = self._conn.execute(
-                    "SELECT amount, comment, created_at FROM transactions ORDER BY created_at DESC"
-                ).fetchall()
-
-            lines = ["Сумма;Комментарий;Дата"]
-            for r in rows:
-                amount = str(r["amount"])
-                comment = (r["comment"] or "").replace("\n", " ").replace("\r", " ")
-                comment = comment.replace('"', '""')
-                if ";" in comment or '"' in comment:
-                    comment = f'"{comment}"'
-                created = str(r["created_at"])
-                lines.append(f"{amount};{comment};{created}")
-
-            content = "\ufeff" + "\n".join(lines)
-            Path(path).write_text(content, encoding="utf-8")
-            return {"ok": True, "path": path, "count": len(rows)}
+                self._flush_tx_pending_unlocked()
+            with self._read_connection() as conn, open(
+                path, "w", encoding="utf-8", newline=""
+            ) as fp:
+                fp.write("\ufeff")
+                writer = csv.writer(fp, delimiter=";", lineterminator="\n")
+                writer.writerow(("Сумма", "Комментарий", "Дата"))
+                for amt, comm, created in _tuple_cursor(conn).execute(_SQL_TX_EXPORT):
+                    writer.writerow((amt, (comm or "").translate(_CSV_NEWLINE_TRANS), created))
+                    count += 1
+            return {"ok": True, "path": path, "count": count}
         except Exception:
             self._logger.exception("export_csv failed")
             return {"ok": False, "error": "INTERNAL_ERROR"}
@@ -1094,51 +1375,55 @@ class DesktopApi:
             if not path:
                 return {"ok": False, "error": "CANCELLED"}
 
+            count = 0
             with self._lock:
-                rows = self._conn.execute(
-                    "SELECT id, amount, comment, created_at FROM transactions ORDER BY created_at DESC"
-                ).fetchall()
-                inv = self._conn.execute(
-                    """
-                    SELECT id, name, purchase_price, quantity, image_data, purchased_at, purchase_tx_id
-                    FROM inventory_items ORDER BY purchased_at DESC
-                    """
-                ).fetchall()
-                settings_rows = self._conn.execute(
-                    "SELECT key, value FROM settings ORDER BY key ASC"
-                ).fetchall()
-
-            items = [
-                {
-                    "id": int(r["id"]),
-                    "amount": float(r["amount"]),
-                    "comment": r["comment"] or "",
-                    "createdAt": str(r["created_at"]),
-                }
-                for r in rows
-            ]
-            inventory = [
-                {
-                    "id": int(r["id"]),
-                    "name": r["name"] or "",
-                    "purchasePrice": float(r["purchase_price"]),
-                    "quantity": int(r["quantity"]),
-                    "imageDataUrl": r["image_data"] or "",
-                    "purchasedAt": str(r["purchased_at"]),
-                    "purchaseTxId": int(r["purchase_tx_id"]),
+                self._flush_tx_pending_unlocked()
+            with self._read_connection() as conn, open(path, "wb") as fp:
+                # One read transaction so all three tables come from the same snapshot.
+                conn.execute("BEGIN")
+                fp.write(b'{"app":' + _json_bytes(APP_NAME))
+                fp.write(b',"version":' + _json_bytes(APP_VERSION))
+                fp.write(b',"exportedAt":' + _json_bytes(_utc_iso_now()))
+                fp.write(b',"transactions":[')
+                for tx_id, amt, comm, created in _tuple_cursor(conn).execute(_SQL_TX_LIST):
+                    if count:
+                        fp.write(b",")
+                    fp.write(
+                        _json_bytes(
+                            {"id": tx_id, "amount": amt, "comment": comm or "", "createdAt": created}
+                        )
+                    )
+                    count += 1
+                fp.write(b'],"inventoryItems":[')
+                for index, r in enumerate(
+                    conn.execute(
+                        """
+                        SELECT id, name, purchase_price, quantity, image_data, purchased_at, purchase_tx_id
+                        FROM inventory_items ORDER BY purchased_at DESC
+                        """
+                    )
+                ):
+                    if index:
+                        fp.write(b",")
+                    fp.write(
+                        _json_bytes(
+                            {
+                                "id": int(r["id"]),
+                                "name": r["name"] or "",
+                                "purchasePrice": float(r["purchase_price"]),
+                                "quantity": int(r["quantity"]),
+                                "imageDataUrl": r["image_data"] or "",
+                                "purchasedAt": str(r["purchased_at"]),
+                                "purchaseTxId": int(r["purchase_tx_id"]),
+                            }
+                        )
+                    )
+                settings = {
+                    str(r["key"]): str(r["value"])
+                    for r in conn.execute("SELECT key, value FROM settings ORDER BY key ASC")
                 }
-                for r in inv
-            ]
-            payload = {
-                "app": APP_NAME,
-                "version": APP_VERSION,
-                "exportedAt": _utc_iso_now(),
-                "transactions": items,
-                "inventoryItems": inventory,
-                "settings": {str(r["key"]): str(r["value"]) for r in settings_rows},
-            }
-            Path(path).write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-            return {"ok": True, "path": path, "count": len(items)}
+                fp.write(b'],"settings":' + _json_bytes(settings) + b"}")
+            return {"ok": True, "path": path, "count": count}
         except Exception:
             self._logger.exception("backup_json failed")
             return {"ok": False, "error": "INTERNAL_ERROR"}
@@ -1146,15 +1431,28 @@ class DesktopApi:
     def close(self) -> None:
         if self._hotkey_listener:
             self._hotkey_listener.stop()
+        with self._tx_cond:
+            self._tx_closing = True
+            self._tx_cond.notify()
+        self._tx_writer.join(timeout=5.0)
         try:
             with self._lock:
+                try:
+                    self._flush_tx_pending_unlocked()
+                except Exception:
+                    self._logger.exception(
+                        "Dropping %d queued transactions on close", len(self._tx_pending)
+                    )
                 self._conn.close()
+            with self._read_pool_lock:
+                for conn in self._read_pool:
+                    conn.close()
+                self._read_pool.clear()
         except Exception:
             pass
 
 
-def inject_hotkeys(window, logger: logging.Logger) -> None:
-    js = r"""
+_HOTKEYS_JS_SRC = r"""
 (() => {
   try {
     if (window.__torcalcHotkeysInstalled) return true;
@@ -1184,13 +1482,31 @@ def inject_hotkeys(window, logger: logging.Logger) -> None:
   }
 })();
 """
+# Shipped to the renderer on every page load, so send it with whitespace collapsed.
+_HOTKEYS_JS = re.sub(r"\s+", " ", _HOTKEYS_JS_SRC).strip()
+
+
+def inject_hotkeys(window, logger: logging.Logger) -> None:
     try:
-        window.evaluate_js(js)
+        window.evaluate_js(_HOTKEYS_JS)
         logger.debug("Hotkeys injected")
     except Exception:
         logger.exception("Failed to inject hotkeys")
 
 
+def _preload_webview() -> None:
+    # Importing webview pulls in the GUI bindings; doing it on a side thread
+    # overlaps that cost with UI server startup. The later `import webview`
+    # in main() waits on the module lock or returns the cached module.
+    def _import() -> None:
+        try:
+            import webview  # noqa: F401
+        except Exception:
+            pass
+
+    threading.Thread(target=_import, name="webview-preload", daemon=True).start()
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description=f"{APP_NAME} desktop (pywebview)")
     parser.add_argument("--dev", action="store_true", help="Enable development mode")
@@ -1203,6 +1519,7 @@ def main() -> int:
         help="Seconds to wait for UI server to start",
     )
     args = parser.parse_args()
+    _preload_webview()
 
     requested_dev = args.dev or os.getenv("TORCALC_DEV", "").strip() in {"1", "true", "yes", "on"}
     dev = requested_dev
@@ -1248,10 +1565,9 @@ def main() -> int:
                     )
 
                     if os.name == "nt":
-                        pid = _windows_get_listen_pid(port, logger)
+                        pid, cmd = _windows_get_pid_and_cmd(port, logger)
                         if pid:
-                            cmd = _windows_get_commandline(pid, logger)
-                            if str(UI_DIR).lower() in cmd.lower() and "node_modules\\next\\dist\\server\\lib\\start-server.js" in cmd.lower():
+                            if _looks_like_our_next(cmd, UI_DIR):
                                 _windows_kill_pid(pid, logger)
                             else:
                                 logger.error(
@@ -1287,8 +1603,12 @@ def main() -> int:
                         )
                         port = pick_free_port(args.host, port)
 
+            ui_ready: Optional[threading.Event] = None
             if not is_port_open(args.host, port):
-                node_proc = start_next_server(ui_dir=UI_DIR, port=port, dev=dev, logger=logger)
+                ui_ready = threading.Event()
+                node_proc = start_next_server(
+                    ui_dir=UI_DIR, port=port, dev=dev, logger=logger, ready=ui_ready
+                )
 
             def _cleanup_proc() -> None:
                 if not node_proc:
@@ -1304,7 +1624,7 @@ def main() -> int:
 
             atexit.register(_cleanup_proc)
 
-            wait_for_http(args.host, port, args.ui_timeout, logger)
+            wait_for_http(args.host, port, args.ui_timeout, logger, ready=ui_ready)
             target = f"http://{args.host}:{port}/?torcalc_desktop=1"
 
         import webview
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+
+import app
+
+
+def _quiet_logger() -> logging.Logger:
+    logger = logging.getLogger("tor_calculator.tests")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    return logger
+
+
+class TransactionQueueTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.data_dir = Path(tmp.name)
+        self.db_path = self.data_dir / "torcalc.db"
+        self.api = self._open()
+
+    def _open(self) -> app.DesktopApi:
+        api = app.DesktopApi(_quiet_logger(), data_dir=self.data_dir, db_path=self.db_path)
+        self.addCleanup(api.close)
+        return api
+
+    def test_non_finite_amount_is_rejected(self) -> None:
+        for amount in ("nan", "inf", "-inf", float("nan")):
+            with self.subTest(amount=amount):
+                self.assertEqual(
+                    self.api.transaction_add(amount),
+                    {"ok": False, "error": "INVALID_AMOUNT"},
+                )
+
+    def test_nan_does_not_block_later_adds(self) -> None:
+        self.assertTrue(self.api.transaction_add("5")["ok"])
+        self.assertFalse(self.api.transaction_add("nan")["ok"])
+        added = self.api.transaction_add("7")
+        self.assertTrue(added["ok"])
+
+        listed = self.api.transactions_list()
+        self.assertTrue(listed["ok"])
+        self.assertEqual([item["amount"] for item in listed["items"]], [7.0, 5.0])
+        self.assertEqual(self.api.transaction_delete(added["item"]["id"]), {"ok": True, "deleted": 1})
+
+        self.api.close()
+        reopened = self._open()
+        self.assertEqual([item["amount"] for item in reopened.transactions_list()["items"]], [5.0])
+
+    def test_integrity_error_drops_only_the_bad_row(self) -> None:
+        with self.api._tx_cond:
+            tx_id = self.api._next_transaction_id_unlocked()
+            self.api._tx_pending.append((tx_id, None, "bad", app._utc_iso_now()))
+        self.assertTrue(self.api.transaction_add("3", "good")["ok"])
+
+        listed = self.api.transactions_list()
+        self.assertTrue(listed["ok"])
+        self.assertEqual([item["comment"] for item in listed["items"]], ["good"])
+        self.assertEqual(self.api._tx_pending, [])
+
+
+if __name__ == "__main__":
+    unittest.main()